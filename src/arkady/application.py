@@ -7,6 +7,7 @@
 import asyncio
 import zmq
 import zmq.asyncio
+from .diagnostics import CONTROL_NAMES, Profiler, Tracer
 from .listeners import router, sub
 
 
@@ -28,6 +29,8 @@ class Application(object):
         self.component_key_map = {}
         self._components = []
         self._listeners = []
+        self.tracer = Tracer()
+        self.profiler = Profiler()
         self.config()
 
     def config(self):
@@ -39,7 +42,7 @@ class Application(object):
         """
         pass
 
-    def add_router(self, bind_to=None):
+    def add_router(self, bind_to=None, control=False):
         """
         Creates and configures a router-type listener for the `Application`
         for use in Request-Reply (REQ-REP) communication.
@@ -54,10 +57,20 @@ class Application(object):
         the one that you want. Implementation, and further documentation, is in
         `arkady.listeners`
 
-        :param bind_to: A network string such as 'tcp://*:5555'
-        :type bind_to: str
+        Passing a list of network strings binds one router on all of them, so
+        that local clients may use a faster transport such as ``ipc`` while
+        remote clients use ``tcp``, with both reaching the same components.
+
+        With `control` set, the router also answers the ``_trace`` and
+        ``_profile`` diagnostics messages described in `arkady.diagnostics`.
+        It is off by default since any client of the router could use them.
+
+        :param bind_to: A network string such as 'tcp://*:5555', or a list of them
+        :type bind_to: str or [str]
+        :param control: Whether to answer diagnostics control messages
+        :type control: bool
         """
-        self._listeners.append(router(self, bind_to=bind_to))
+        self._listeners.append(router(self, bind_to=bind_to, control=control))
 
     def add_sub(self, connect_to=None, topics=None):
         """
@@ -103,6 +116,8 @@ class Application(object):
             self.zmq_context.term()
 
     def add_component(self, name: str, component_class, *args, **kwargs):
+        if name in CONTROL_NAMES:
+            raise ValueError('Cannot register {}, name is reserved'.format(name))
         component = component_class(*args,
                                     loop=self.loop,
                                     **kwargs)
@@ -112,6 +127,8 @@ class Application(object):
     def api_register(self, name, component):
         if name in self.component_key_map:
             raise ValueError('Cannot register {}, already registered'.format(name))
+        if name in CONTROL_NAMES:
+            raise ValueError('Cannot register {}, name is reserved'.format(name))
         self.component_key_map[name] = component
         self.components.append(component)
 
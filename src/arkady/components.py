@@ -18,6 +18,7 @@ import asyncio
 import concurrent.futures
 from functools import partial
 import uuid
+from .diagnostics import traced
 
 
 class Component(object):
@@ -47,6 +48,7 @@ class Component(object):
                        headers=None,
                        return_queue=None,
                        topic=None,
+                       trace=None,
                        ):
         """
         Scheduled as a task on the loop by listeners, this method is responsible
@@ -55,12 +57,15 @@ class Component(object):
         :param headers:
         :param return_queue:
         :param topic:
+        :param trace: An `arkady.diagnostics.Trace` if the request is traced
         :return:
         """
         meta_id = None
         if headers is not None:
             meta_id = uuid.uuid4()
-            self.jobs_meta[meta_id] = (headers, return_queue)
+            self.jobs_meta[meta_id] = (headers, return_queue, trace)
+            if trace is not None:
+                trace.mark('_handler')
 
         if topic is not None:
             handler = partial(self.handler, msg=msg, topic=topic)
@@ -68,6 +73,14 @@ class Component(object):
             handler = partial(self.handler, msg=msg)
         await self.jobs.put((handler, meta_id))
 
+    def _job_trace(self, meta_id):
+        """
+        Returns the trace registered for the job `meta_id`, if any.
+        """
+        if meta_id is None:
+            return None
+        return self.jobs_meta[meta_id][2]
+
     def handler(self, msg: str) -> str:
         raise NotImplementedError
 
@@ -83,11 +96,16 @@ class SerialComponent(Component):
         while True:
             handler, meta_id = await self.jobs.get()
             if meta_id is not None:  # We expect to send a reply
-                headers, return_queue = self.jobs_meta.pop(meta_id)
-                reply = await self.loop.run_in_executor(self.executor, handler)
+                headers, return_queue, trace = self.jobs_meta.pop(meta_id)
+                if trace is not None:
+                    trace.mark('requests_runner')
+                reply = await self.loop.run_in_executor(self.executor,
+                                                        traced(handler, trace))
+                if trace is not None:
+                    trace.mark('handler')
                 if reply is None:  # If we get a None return, just acknowledge completion
                     reply = 'ACK'
-                await return_queue.put(headers + [reply.encode('utf-8')])
+                await return_queue.put((headers + [reply.encode('utf-8')], trace))
             else:
                 await self.loop.run_in_executor(self.executor, handler)
 
@@ -108,19 +126,24 @@ class AsyncComponent(Component):
             else:
                 await self.loop.run_in_executor(None, func)
         else:  # We should send back a reply
+            headers, return_queue, trace = self.jobs_meta.pop(meta_id)
             if asyncio.iscoroutinefunction(func.func):
                 reply = await func()
             else:
-                reply = await self.loop.run_in_executor(None, func)
+                reply = await self.loop.run_in_executor(None, traced(func, trace))
+            if trace is not None:
+                trace.mark('handler')
             if reply is None:  # If we get a None return, just acknowledge completion
                 reply = 'ACK'
-            headers, return_queue = self.jobs_meta.pop(meta_id)
-            await return_queue.put(headers + [reply.encode('utf-8')])
+            await return_queue.put((headers + [reply.encode('utf-8')], trace))
 
     # Gets run as a coroutine
     async def requests_runner(self):
         while True:
             handler, meta_id = await self.jobs.get()
+            trace = self._job_trace(meta_id)
+            if trace is not None:
+                trace.mark('requests_runner')
             # Just turn jobs into tasks
             self.loop.create_task(self.enqueue(handler, meta_id))
             # if meta_id is not None:  # We expect to send a reply
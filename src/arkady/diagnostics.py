@@ -0,0 +1,223 @@
+# coding: utf-8
+
+"""
+Runtime diagnostics for a running `Application`: sampled per-request tracing
+and on-demand profiling of the event loop.
+
+Both are driven by control messages sent to a ``router`` listener created with
+``control=True``, so they can be switched on and off without restarting the
+application. A control message is any request whose first word is one of the
+reserved names below; it is handled by the listener itself and never reaches a
+component. These names may not be used as component names.
+
+``_trace [start] [slow>Nms] [sample=R]``
+    Start tracing. Only requests slower than ``N`` milliseconds (default 0)
+    are kept, and only a fraction ``R`` (default 1.0) of requests is traced.
+``_trace report``
+    Reply with the collected slow traces, tracing continues.
+``_trace stop``
+    Stop tracing and reply with the collected slow traces.
+``_profile start``
+    Start a `cProfile` capture of the event loop thread.
+``_profile stop [N]``
+    Stop the capture and reply with the top ``N`` (default 20) entries sorted
+    by cumulative time.
+
+A trace records a timestamp at each stage of a request's life: ``receive``
+(read from the socket), ``decode`` (decoded and routed by the listener),
+``_handler`` (queued on the component),
+``requests_runner`` (taken off the component queue), ``executor`` (started in
+the executor thread, for non-coroutine handlers), ``handler`` (handler
+returned) and ``transmit`` (reply sent).
+"""
+
+import cProfile
+from collections import deque
+import io
+import pstats
+import random
+import re
+import time
+
+
+class Trace(object):
+    """
+    Timestamps for the stages of a single request.
+    """
+    __slots__ = ('name', 'stages')
+
+    def __init__(self, name, received):
+        self.name = name
+        self.stages = [('receive', received), ('decode', time.perf_counter())]
+
+    def mark(self, stage):
+        self.stages.append((stage, time.perf_counter()))
+
+    @property
+    def elapsed(self):
+        """
+        Seconds between the first and the last recorded stage.
+        """
+        return self.stages[-1][1] - self.stages[0][1]
+
+    def summary(self):
+        """
+        A one-line report: total milliseconds then the milliseconds spent
+        reaching each stage from the previous one.
+        """
+        parts = []
+        previous = self.stages[0][1]
+        for stage, stamp in self.stages[1:]:
+            parts.append('{}={:.2f}'.format(stage, (stamp - previous) * 1000))
+            previous = stamp
+        return '{} {:.2f}ms {}'.format(self.name,
+                                       self.elapsed * 1000,
+                                       ' '.join(parts))
+
+
+def traced(func, trace):
+    """
+    Wraps `func` so that the ``executor`` stage is marked on `trace` when it
+    begins running. Returns `func` unchanged if `trace` is None.
+    """
+    if trace is None:
+        return func
+
+    def call():
+        trace.mark('executor')
+        return func()
+    return call
+
+
+class Tracer(object):
+    """
+    Samples requests for tracing and keeps the most recent slow ones.
+    """
+    def __init__(self, maxlen=100):
+        self.active = False
+        self.threshold = 0.0
+        self.sample_rate = 1.0
+        self.slow = deque(maxlen=maxlen)
+        self.seen = 0
+
+    def start(self, threshold=0.0, sample_rate=1.0):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.slow.clear()
+        self.seen = 0
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def begin(self, name, received):
+        """
+        Returns a new `Trace` for a request to component `name`, read from the
+        socket at `received` (a `time.perf_counter` value), if tracing is
+        active and the request is sampled, otherwise None.
+        """
+        if not self.active:
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        return Trace(name, received)
+
+    def finish(self, trace):
+        """
+        Marks the ``transmit`` stage and keeps `trace` if it was slow.
+        """
+        trace.mark('transmit')
+        self.seen += 1
+        if trace.elapsed >= self.threshold:
+            self.slow.append(trace)
+
+    def report(self):
+        lines = ['traced={} slow={} threshold={:g}ms sample={:g}'.format(
+            self.seen, len(self.slow), self.threshold * 1000, self.sample_rate)]
+        lines.extend(trace.summary() for trace in self.slow)
+        return '\n'.join(lines)
+
+
+class Profiler(object):
+    """
+    On-demand `cProfile` capture of the thread running the event loop.
+    """
+    def __init__(self):
+        self._profile = None
+
+    @property
+    def active(self):
+        return self._profile is not None
+
+    def start(self):
+        if self._profile is None:
+            profile = cProfile.Profile()
+            # Only keep the profile once enable() succeeds, it raises if
+            # another tool already holds the profiler
+            profile.enable()
+            self._profile = profile
+
+    def stop(self, limit=20):
+        """
+        Stops the capture and returns the `limit` most expensive entries by
+        cumulative time.
+        """
+        if self._profile is None:
+            return 'profiler not running'
+        profile, self._profile = self._profile, None
+        profile.create_stats()
+        if not profile.stats:
+            return 'no samples'
+        stream = io.StringIO()
+        stats = pstats.Stats(profile, stream=stream)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+
+CONTROL_NAMES = ('_trace', '_profile')
+
+_SLOW_RE = re.compile(r'^slow>(\d+(?:\.\d+)?)(ms|s)?$')
+_SAMPLE_RE = re.compile(r'^sample=(\d*\.?\d+)$')
+
+
+def control(application, name, msg):
+    """
+    Carries out a control message for `application` and returns the reply
+    string. `name` must be one of `CONTROL_NAMES`.
+
+    :raises ValueError: If the control message is not understood, or if the
+        profiler cannot be started
+    """
+    args = msg.split()
+    if name == '_profile':
+        profiler = application.profiler
+        if args[:1] == ['start']:
+            profiler.start()
+            return 'ACK'
+        if args[:1] == ['stop']:
+            limit = int(args[1]) if len(args) > 1 else 20
+            return profiler.stop(limit)
+        raise ValueError('Unrecognized _profile message: {}'.format(msg))
+
+    tracer = application.tracer
+    if args[:1] == ['report']:
+        return tracer.report()
+    if args[:1] == ['stop']:
+        tracer.stop()
+        return tracer.report()
+    threshold, sample_rate = 0.0, 1.0
+    for arg in args:
+        if arg == 'start':
+            continue
+        slow = _SLOW_RE.match(arg)
+        sample = _SAMPLE_RE.match(arg)
+        if slow:
+            threshold = float(slow.group(1))
+            if slow.group(2) != 's':
+                threshold /= 1000
+        elif sample:
+            sample_rate = float(sample.group(1))
+        else:
+            raise ValueError('Unrecognized _trace argument: {}'.format(arg))
+    tracer.start(threshold=threshold, sample_rate=sample_rate)
+    return 'ACK'
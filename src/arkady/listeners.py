@@ -4,54 +4,87 @@
 """
 
 import asyncio
+import time
 import zmq
 import zmq.asyncio
+from . import diagnostics
 
 
-async def router(application, bind_to=None):
+async def router(application, bind_to=None, control=False):
     """
     The ``router`` listener handles asynchronous requests in the request-reply
     pattern. A request of type `zmq.REQ` shall be given a reply of type `zmq.REP`
 
+    If `control` is True, requests addressed to ``_trace`` or ``_profile`` are
+    control messages, answered by the listener itself; see
+    `arkady.diagnostics`. Leave it off on routers reachable by untrusted
+    clients, as profiling slows the whole event loop.
+
+    A list of network paths binds the one socket on each of them, such as
+    ``['tcp://*:5555', 'ipc:///tmp/arkady']``. Requests from every endpoint
+    share the same components and reply queue, and replies are routed back
+    over whichever endpoint the request arrived on.
+
     :param application:
-    :param bind_to: Network path on which to listen. Defaults to ``'tcp://*:5555'``
-    :type bind_to: string
+    :param bind_to: Network path(s) on which to listen. Defaults to ``'tcp://*:5555'``
+    :type bind_to: string or [string]
+    :param control: Whether to answer diagnostics control messages
+    :type control: bool
     :return:
     """
 
     if bind_to is None:
         bind_to = 'tcp://*:5555'
 
+    if isinstance(bind_to, str):
+        bind_to = [bind_to]
+
     loop = asyncio.get_event_loop()
 
     rsock = application.zmq_context.socket(zmq.ROUTER)
-    rsock.bind(bind_to)
+    for endpoint in bind_to:
+        rsock.bind(endpoint)
 
     return_queue = asyncio.Queue()
 
     async def receive():
         while True:
             request = await rsock.recv_multipart()
+            received = time.perf_counter()
             # Separate the header from the body of the message
             headers, body = request[0:2], request[2]
             body = body.decode('utf-8')
             # Separate the name from the msg to find the component to pass msg to
-            name, msg = body.split(maxsplit=1)
+            name, *msg = body.split(maxsplit=1)
+            msg = msg[0] if msg else ''
+            if control and name in diagnostics.CONTROL_NAMES:
+                try:
+                    reply = diagnostics.control(application, name, msg)
+                except Exception as e:
+                    # A diagnostics command must never take down the listener
+                    reply = str(e)
+                await return_queue.put((headers + [reply.encode('utf-8')], None))
+                continue
             component = application.component_key_map[name]
             # Pass the header, msg, and return_queue to component for enqueuing
             loop.create_task(
                 component._handler(
                     headers=headers,
                     msg=msg,
-                    return_queue=return_queue
+                    return_queue=return_queue,
+                    trace=application.tracer.begin(name, received),
                 )
             )
 
     async def transmit():
         while True:
-            reply = await return_queue.get()
+            # get() does not yield while replies are waiting, so ready replies
+            # are sent back-to-back, each taken off the queue only as it is sent
+            reply, trace = await return_queue.get()
             # the reply should have the original headers prepended
-            rsock.send_multipart(reply)
+            await rsock.send_multipart(reply)
+            if trace is not None:
+                application.tracer.finish(trace)
 
     try:
         await asyncio.gather(receive(), transmit())
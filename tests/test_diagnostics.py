@@ -0,0 +1,124 @@
+from arkady.diagnostics import CONTROL_NAMES, Profiler, Trace, Tracer, control
+
+import cProfile
+import pytest
+import time
+
+
+class StubApplication(object):
+    def __init__(self):
+        self.tracer = Tracer()
+        self.profiler = Profiler()
+
+
+def make_trace(name, stamps):
+    trace = Trace(name, stamps[0])
+    trace.stages = list(zip(['receive', 'decode', '_handler', 'transmit'], stamps))
+    return trace
+
+
+def test_control_names():
+    assert CONTROL_NAMES == ('_trace', '_profile')
+
+
+def test_trace_defaults():
+    app = StubApplication()
+    assert control(app, '_trace', '') == 'ACK'
+    assert app.tracer.active
+    assert app.tracer.threshold == 0.0
+    assert app.tracer.sample_rate == 1.0
+
+
+@pytest.mark.parametrize('msg, threshold', [
+    ('slow>50ms', 0.05),
+    ('slow>50', 0.05),
+    ('start slow>2.5ms', 0.0025),
+    ('slow>2s', 2.0),
+])
+def test_trace_threshold(msg, threshold):
+    app = StubApplication()
+    assert control(app, '_trace', msg) == 'ACK'
+    assert app.tracer.threshold == pytest.approx(threshold)
+
+
+def test_trace_sample_rate():
+    app = StubApplication()
+    assert control(app, '_trace', 'slow>10ms sample=0.25') == 'ACK'
+    assert app.tracer.threshold == pytest.approx(0.01)
+    assert app.tracer.sample_rate == 0.25
+
+
+@pytest.mark.parametrize('msg', ['slow<5ms', 'sample=', 'fast'])
+def test_trace_bad_argument(msg):
+    app = StubApplication()
+    with pytest.raises(ValueError, match='Unrecognized _trace argument'):
+        control(app, '_trace', msg)
+    assert not app.tracer.active
+
+
+def test_trace_sampled_out():
+    tracer = Tracer()
+    tracer.start(sample_rate=0.0)
+    assert tracer.begin('serial', 0.0) is None
+    tracer.stop()
+    assert tracer.begin('serial', 0.0) is None
+
+
+def test_tracer_finish_threshold():
+    app = StubApplication()
+    control(app, '_trace', 'slow>50ms')
+    fast = Trace('fast', time.perf_counter())
+    slow = Trace('slow', time.perf_counter() - 0.1)
+    app.tracer.finish(fast)
+    app.tracer.finish(slow)
+    assert app.tracer.seen == 2
+    assert list(app.tracer.slow) == [slow]
+
+
+def test_trace_report_and_stop():
+    app = StubApplication()
+    control(app, '_trace', 'slow>0ms sample=0.5')
+    trace = make_trace('serial', [0.0, 0.001, 0.003, 0.006])
+    app.tracer.slow.append(trace)
+    app.tracer.seen = 1
+    report = control(app, '_trace', 'report')
+    assert app.tracer.active
+    assert control(app, '_trace', 'stop') == report
+    assert not app.tracer.active
+    header, line = report.split('\n')
+    assert header == 'traced=1 slow=1 threshold=0ms sample=0.5'
+    assert line.startswith('serial ')
+
+
+def test_trace_summary():
+    trace = make_trace('serial', [1.0, 1.001, 1.003, 1.006])
+    assert trace.summary() == (
+        'serial 6.00ms decode=1.00 _handler=2.00 transmit=3.00')
+
+
+def test_profile_bad_message():
+    app = StubApplication()
+    with pytest.raises(ValueError, match='Unrecognized _profile message'):
+        control(app, '_profile', 'restart')
+
+
+def test_profile_stop_not_running():
+    app = StubApplication()
+    assert control(app, '_profile', 'stop') == 'profiler not running'
+
+
+def test_profile_start_stop():
+    app = StubApplication()
+    assert control(app, '_profile', 'start') == 'ACK'
+    assert app.profiler.active
+    sorted(range(100))
+    report = control(app, '_profile', 'stop 5')
+    assert not app.profiler.active
+    assert 'cumulative' in report
+
+
+def test_profile_no_samples():
+    app = StubApplication()
+    app.profiler._profile = cProfile.Profile()
+    assert control(app, '_profile', 'stop') == 'no samples'
+    assert not app.profiler.active